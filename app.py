@@ -5,8 +5,8 @@ import os
 import json
 import time
 from flask import Flask, render_template, request, jsonify, send_from_directory, Response
-from models import CampaignBrief
 from gemini_service import GeminiService
+import pipeline
 import mimetypes
 import queue
 import threading
@@ -16,7 +16,7 @@ app.config['UPLOAD_FOLDER'] = 'InputAssets'
 app.config['OUTPUT_FOLDER'] = 'output'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# Initialize Gemini service
+# Initialize Gemini service (cheap; the SDK client is created on first use)
 gemini_service = GeminiService()
 
 # Global message queue for SSE
@@ -27,6 +27,8 @@ queue_lock = threading.Lock()
 @app.route('/')
 def index():
     """Render the main page"""
+    # Users read the page before generating, so get the Gemini client ready now (once per process)
+    gemini_service.warm_up()
     return render_template('index.html')
 
 
@@ -80,11 +82,7 @@ def load_file():
 def get_input_assets():
     """Get list of input assets"""
     try:
-        assets = []
-        if os.path.exists(app.config['UPLOAD_FOLDER']):
-            for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                    assets.append(filename)
+        assets = pipeline.list_images(app.config['UPLOAD_FOLDER'])
         return jsonify({"success": True, "assets": assets})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
@@ -95,19 +93,11 @@ def get_output_images():
     """Get list of generated output images"""
     try:
         output_structure = {}
-        if os.path.exists(app.config['OUTPUT_FOLDER']):
-            for product in os.listdir(app.config['OUTPUT_FOLDER']):
-                product_path = os.path.join(app.config['OUTPUT_FOLDER'], product)
-                if os.path.isdir(product_path):
-                    output_structure[product] = {}
-                    for ratio_folder in os.listdir(product_path):
-                        ratio_path = os.path.join(product_path, ratio_folder)
-                        if os.path.isdir(ratio_path):
-                            images = []
-                            for img in os.listdir(ratio_path):
-                                if img.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                                    images.append(f"{product}/{ratio_folder}/{img}")
-                            output_structure[product][ratio_folder] = images
+        for product, ratio_folders in pipeline.list_output_images(app.config['OUTPUT_FOLDER']).items():
+            output_structure[product] = {
+                ratio_folder: [f"{product}/{ratio_folder}/{img}" for img in images]
+                for ratio_folder, images in ratio_folders.items()
+            }
         return jsonify({"success": True, "images": output_structure})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
@@ -174,112 +164,15 @@ def generate_campaigns():
         
         # Run generation in a background thread
         def run_generation():
+            def log(message, log_type='info'):
+                broadcast_log(session_id, message, log_type)
+
             try:
-                broadcast_log(session_id, "🚀 Starting campaign generation process...", 'info')
-                
-                # Clear old output images first
-                import shutil
-                if os.path.exists(app.config['OUTPUT_FOLDER']):
-                    broadcast_log(session_id, "🗑️  Clearing old campaign images...", 'info')
-                    shutil.rmtree(app.config['OUTPUT_FOLDER'])
-                    os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
-                    broadcast_log(session_id, "✅ Output folder cleared", 'success')
-                    # Signal frontend to clear gallery
-                    broadcast_log(session_id, "", 'gallery_cleared')
-                
-                broadcast_log(session_id, f"📝 Processing {len(briefs)} campaign brief(s)", 'info')
-                
                 # Convert to full paths
                 input_images = [os.path.join(app.config['UPLOAD_FOLDER'], asset) for asset in selected_assets]
-                broadcast_log(session_id, f"📁 Using {len(input_images)} input asset(s)", 'info')
-                
-                results = []
-                
-                for idx, brief_data in enumerate(briefs, 1):
-                    brief = CampaignBrief.from_dict(brief_data)
-                    product_folder = brief.product_name.replace(' ', '_')
-                    
-                    broadcast_log(session_id, f"\n{'='*60}", 'info')
-                    broadcast_log(session_id, f"🎨 [{idx}/{len(briefs)}] Processing: {brief.product_name}", 'info')
-                    broadcast_log(session_id, f"{'='*60}", 'info')
-                    
-                    # Generate 1:1 ratio first
-                    broadcast_log(session_id, f"⏳ Generating 1:1 aspect ratio for {brief.product_name}...", 'info')
-                    image_data_1_1, chat_history = gemini_service.generate_campaign_image(
-                        brief, input_images, aspect_ratio="1:1"
-                    )
-                    
-                    if image_data_1_1:
-                        output_path_1_1 = os.path.join(
-                            app.config['OUTPUT_FOLDER'], 
-                            product_folder, 
-                            "1_1",
-                            "campaign_1_1.png"
-                        )
-                        saved_path_1_1 = gemini_service.save_binary_file(output_path_1_1, image_data_1_1)
-                        broadcast_log(session_id, f"✅ Saved 1:1 image to: {output_path_1_1}", 'success')
-                        # Broadcast image completion to update gallery
-                        broadcast_log(session_id, f"{product_folder}/1_1/campaign_1_1.png", 'image_complete')
-                        
-                        # Generate 9:16 ratio from chat history
-                        broadcast_log(session_id, f"⏳ Generating 9:16 aspect ratio for {brief.product_name}...", 'info')
-                        image_data_9_16, chat_history = gemini_service.generate_campaign_image(
-                            brief, None, aspect_ratio="9:16", chat_history=chat_history
-                        )
-                        
-                        if image_data_9_16:
-                            output_path_9_16 = os.path.join(
-                                app.config['OUTPUT_FOLDER'], 
-                                product_folder, 
-                                "9_16",
-                                "campaign_9_16.png"
-                            )
-                            saved_path_9_16 = gemini_service.save_binary_file(output_path_9_16, image_data_9_16)
-                            broadcast_log(session_id, f"✅ Saved 9:16 image to: {output_path_9_16}", 'success')
-                            # Broadcast image completion to update gallery
-                            broadcast_log(session_id, f"{product_folder}/9_16/campaign_9_16.png", 'image_complete')
-                        
-                        # Generate 16:9 ratio from chat history
-                        broadcast_log(session_id, f"⏳ Generating 16:9 aspect ratio for {brief.product_name}...", 'info')
-                        image_data_16_9, chat_history = gemini_service.generate_campaign_image(
-                            brief, None, aspect_ratio="16:9", chat_history=chat_history
-                        )
-                        
-                        if image_data_16_9:
-                            output_path_16_9 = os.path.join(
-                                app.config['OUTPUT_FOLDER'], 
-                                product_folder, 
-                                "16_9",
-                                "campaign_16_9.png"
-                            )
-                            saved_path_16_9 = gemini_service.save_binary_file(output_path_16_9, image_data_16_9)
-                            broadcast_log(session_id, f"✅ Saved 16:9 image to: {output_path_16_9}", 'success')
-                            # Broadcast image completion to update gallery
-                            broadcast_log(session_id, f"{product_folder}/16_9/campaign_16_9.png", 'image_complete')
-                        
-                        broadcast_log(session_id, f"✨ Completed all aspect ratios for {brief.product_name}", 'success')
-                        
-                        results.append({
-                            "product": brief.product_name,
-                            "success": True,
-                            "paths": {
-                                "1_1": output_path_1_1,
-                                "9_16": output_path_9_16 if image_data_9_16 else None,
-                                "16_9": output_path_16_9 if image_data_16_9 else None
-                            }
-                        })
-                    else:
-                        broadcast_log(session_id, f"❌ Failed to generate image for {brief.product_name}", 'error')
-                        results.append({
-                            "product": brief.product_name,
-                            "success": False,
-                            "error": "Failed to generate image"
-                        })
-                
-                broadcast_log(session_id, f"\n{'='*60}", 'info')
-                broadcast_log(session_id, f"🎉 Campaign generation completed!", 'success')
-                broadcast_log(session_id, f"📊 Generated {len([r for r in results if r['success']])} out of {len(results)} campaign(s)", 'info')
-                broadcast_log(session_id, f"{'='*60}\n", 'info')
+                pipeline.generate_campaigns(
+                    gemini_service, briefs, input_images, app.config['OUTPUT_FOLDER'], log
+                )
                 broadcast_log(session_id, "COMPLETE", 'complete')
                 
             except Exception as e:
@@ -311,90 +204,13 @@ def compliance_check():
         input_images = [os.path.join(app.config['UPLOAD_FOLDER'], asset) for asset in selected_assets]
         
         def run_compliance():
+            def log(message, log_type='info'):
+                broadcast_log(session_id, message, log_type)
+
             try:
-                broadcast_log(session_id, "🔍 Starting compliance checks...", 'info')
-                broadcast_log(session_id, f"📁 Using {len(input_images)} input asset(s) for brand compliance", 'info')
-                
-                compliance_results = []
-                total_checks = 0
-                
-                # Count total checks first
-                if os.path.exists(app.config['OUTPUT_FOLDER']):
-                    for product in os.listdir(app.config['OUTPUT_FOLDER']):
-                        product_path = os.path.join(app.config['OUTPUT_FOLDER'], product)
-                        if os.path.isdir(product_path):
-                            for ratio_folder in os.listdir(product_path):
-                                ratio_path = os.path.join(product_path, ratio_folder)
-                                if os.path.isdir(ratio_path):
-                                    for img_file in os.listdir(ratio_path):
-                                        if img_file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                                            total_checks += 2  # brand + prohibited words
-                
-                broadcast_log(session_id, f"📊 Found {total_checks // 2} image(s) to check", 'info')
-                
-                check_count = 0
-                if os.path.exists(app.config['OUTPUT_FOLDER']):
-                    for product in os.listdir(app.config['OUTPUT_FOLDER']):
-                        product_path = os.path.join(app.config['OUTPUT_FOLDER'], product)
-                        if os.path.isdir(product_path):
-                            product_name = product.replace('_', ' ')
-                            
-                            broadcast_log(session_id, f"\n{'='*60}", 'info')
-                            broadcast_log(session_id, f"🔎 Checking: {product_name}", 'info')
-                            broadcast_log(session_id, f"{'='*60}", 'info')
-                            
-                            # Check each aspect ratio
-                            for ratio_folder in os.listdir(product_path):
-                                ratio_path = os.path.join(product_path, ratio_folder)
-                                if os.path.isdir(ratio_path):
-                                    for img_file in os.listdir(ratio_path):
-                                        if img_file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                                            img_path = os.path.join(ratio_path, img_file)
-                                            ratio_display = ratio_folder.replace('_', ':')
-                                            
-                                            # Brand compliance check
-                                            if input_images:
-                                                check_count += 1
-                                                broadcast_log(session_id, f"⏳ [{check_count}/{total_checks}] Brand compliance check for {product_name} ({ratio_display})...", 'info')
-                                                brand_result = gemini_service.check_brand_compliance(
-                                                    img_path, input_images, product_name, ratio_display
-                                                )
-                                                compliance_results.append(brand_result)
-                                                compliance_results.append("")  # Add blank line for readability
-                                                
-                                                # Determine if passed or failed
-                                                if "PASS" in brand_result or "consistent" in brand_result.lower():
-                                                    broadcast_log(session_id, f"✅ Brand compliance: PASS", 'success')
-                                                else:
-                                                    broadcast_log(session_id, f"⚠️  Brand compliance: Review needed", 'warning')
-                                            
-                                            # Prohibited words check
-                                            check_count += 1
-                                            broadcast_log(session_id, f"⏳ [{check_count}/{total_checks}] Prohibited words check for {product_name} ({ratio_display})...", 'info')
-                                            words_result = gemini_service.check_prohibited_words(
-                                                img_path, product_name, ratio_display
-                                            )
-                                            compliance_results.append(words_result)
-                                            compliance_results.append("=" * 80)  # Add separator for readability
-                                            compliance_results.append("")  # Add blank line for readability
-                                            
-                                            # Determine if passed or failed
-                                            if "PASS" in words_result or "No prohibited" in words_result:
-                                                broadcast_log(session_id, f"✅ Prohibited words check: PASS", 'success')
-                                            else:
-                                                broadcast_log(session_id, f"⚠️  Prohibited words check: Review needed", 'warning')
-                
-                # Save to Compliance_Checks.txt
-                broadcast_log(session_id, f"\n💾 Saving results to Compliance_Checks.txt...", 'info')
-                with open('Compliance_Checks.txt', 'w') as f:
-                    for result in compliance_results:
-                        f.write(result + '\n')
-                
-                broadcast_log(session_id, f"\n{'='*60}", 'info')
-                broadcast_log(session_id, f"🎉 Compliance checks completed!", 'success')
-                broadcast_log(session_id, f"📋 Total checks performed: {len(compliance_results)}", 'info')
-                broadcast_log(session_id, f"💾 Results saved to: Compliance_Checks.txt", 'info')
-                broadcast_log(session_id, f"{'='*60}\n", 'info')
+                pipeline.run_compliance_checks(
+                    gemini_service, input_images, app.config['OUTPUT_FOLDER'], log
+                )
                 broadcast_log(session_id, "COMPLETE", 'complete')
                 
             except Exception as e:
@@ -0,0 +1,96 @@
+"""
+Startup benchmark - measures import time of the app and CLI, the time for
+the Flask app to serve its first response, and how long the first Gemini
+request waits for the client with and without a warm-up
+
+Each measurement runs in a fresh Python process so module caches don't
+hide the cost a new worker pays.
+
+Example:
+    python benchmark_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Script run in a fresh interpreter; prints timings in seconds as JSON
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+timings = {{"import": imported - start}}
+if {first_response}:
+    response = {module}.app.test_client().get('/')
+    assert response.status_code == 200, response.status_code
+    timings["first_response"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+# Time the first request waits for the Gemini client, cold or warmed up earlier.
+# The warm-up here only imports the SDK and builds the client (as GeminiService.warm_up
+# does before its API call), so it runs without network access.
+CLIENT_SCRIPT = """
+import json, threading, time
+from gemini_service import GeminiService
+service = GeminiService()
+if {warm}:
+    threading.Thread(target=lambda: service.client).start()
+    time.sleep({delay})  # The user reading the page before clicking Generate
+start = time.perf_counter()
+service.client
+print(json.dumps({{"client_wait": time.perf_counter() - start}}))
+"""
+
+
+def run_script(script):
+    """Run a measurement script in a fresh process and return its timings"""
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT, stderr=subprocess.DEVNULL)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def measure(module, first_response=False):
+    """Measure startup timings for a module in a fresh process"""
+    return run_script(MEASURE_SCRIPT.format(module=module, first_response=first_response))
+
+
+def measure_client(warm, delay=1.0):
+    """Measure how long the first request waits for the Gemini client"""
+    return run_script(CLIENT_SCRIPT.format(warm=warm, delay=delay))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app and CLI startup time")
+    parser.add_argument('--runs', type=int, default=5,
+                        help="Number of fresh processes per measurement (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        ("app", lambda: measure("app", first_response=True)),
+        ("cli", lambda: measure("cli")),
+        ("cold", lambda: measure_client(warm=False)),
+        ("warmed", lambda: measure_client(warm=True)),
+    ]
+
+    print("=" * 50)
+    print(f"Startup benchmark ({args.runs} runs, median)")
+    print("=" * 50)
+    for name, benchmark in benchmarks:
+        try:
+            runs = [benchmark() for _ in range(args.runs)]
+        except subprocess.CalledProcessError:
+            print(f"{name:<6} skipped (missing dependencies?)")
+            continue
+        for metric in runs[0]:
+            median_ms = statistics.median(run[metric] for run in runs) * 1000
+            print(f"{name:<6} {metric:<16} {median_ms:8.1f} ms")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    main()
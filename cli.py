@@ -0,0 +1,121 @@
+"""
+Creative Automation Pipeline - Headless command-line runner
+
+Runs campaign generation and compliance checks without the web UI and
+streams progress to stdout as JSON Lines, one log message per line.
+
+Example:
+    python cli.py --briefs inputs/campaign_briefs.json --assets InputAssets
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import pipeline
+from gemini_service import GeminiService
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate campaign images and run compliance checks without the web UI"
+    )
+    parser.add_argument('--briefs', default='inputs/campaign_briefs.json',
+                        help="Campaign briefs JSON file (default: %(default)s)")
+    parser.add_argument('--assets', default='InputAssets',
+                        help="Directory of input asset images (default: %(default)s)")
+    parser.add_argument('--output', default='output',
+                        help="Output folder for generated images (default: %(default)s)")
+    parser.add_argument('--report', default='Compliance_Checks.txt',
+                        help="Compliance report file (default: %(default)s)")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="Number of briefs/products processed in parallel (default: %(default)s)")
+    parser.add_argument('--cache', metavar='FILE',
+                        help="JSON file caching compliance results of unchanged images")
+    parser.add_argument('--resume', action='store_true',
+                        help="Keep existing output and skip briefs already fully generated")
+    parser.add_argument('--skip-generation', action='store_true',
+                        help="Only run compliance checks on existing output")
+    parser.add_argument('--skip-compliance', action='store_true',
+                        help="Only generate images")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.skip_generation and args.skip_compliance:
+        parser.error("--skip-generation and --skip-compliance cannot be combined")
+    # Generation clears the output folder first, so never point it at anything else
+    if not args.skip_generation and not args.resume and not pipeline.is_output_tree(args.output):
+        parser.error(f"--output {args.output} contains files other than generated campaign images; "
+                     "refusing to clear it")
+    return args
+
+
+def make_logger(stream):
+    """Create a log callback writing JSON Lines messages to a stream"""
+    lock = threading.Lock()
+
+    def log(message, log_type='info'):
+        line = json.dumps({
+            'type': log_type,
+            'message': message,
+            'timestamp': time.time()
+        })
+        with lock:
+            stream.write(line + '\n')
+            stream.flush()
+
+    return log
+
+
+def run(args, log):
+    """Run the pipeline and return the process exit code"""
+    with open(args.briefs, 'r') as f:
+        briefs = json.load(f)
+    input_images = [os.path.join(args.assets, asset) for asset in pipeline.list_images(args.assets)]
+
+    gemini_service = GeminiService()
+
+    exit_code = 0
+
+    if not args.skip_generation:
+        results = pipeline.generate_campaigns(
+            gemini_service, briefs, input_images, args.output, log,
+            concurrency=args.concurrency, resume=args.resume
+        )
+        # A brief missing any aspect ratio counts as a failure
+        if not all(result['success'] for result in results):
+            exit_code = 1
+
+    if not args.skip_compliance:
+        _, failed_products = pipeline.run_compliance_checks(
+            gemini_service, input_images, args.output, log,
+            report_path=args.report, concurrency=args.concurrency, cache_path=args.cache
+        )
+        if failed_products:
+            exit_code = 1
+
+    return exit_code
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = make_logger(sys.stdout)
+
+    # Keep stdout pure JSON Lines; diagnostic prints from the services go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            exit_code = run(args, log)
+        except Exception as e:
+            import traceback
+            log(f"❌ Error during pipeline run: {str(e)}", 'error')
+            log(traceback.format_exc(), 'error')
+            exit_code = 1
+
+    log("FAILED" if exit_code else "COMPLETE", 'complete')
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
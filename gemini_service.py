@@ -4,37 +4,134 @@ Service for interacting with Google Gemini 2.5 Flash API
 import base64
 import mimetypes
 import os
-from google import genai
-from google.genai import types
+import tempfile
+import threading
 import config
 
 
+# Process umask, read once at import since os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# URI scheme marking chat history parts that point at a generated image saved on disk
+LOCAL_FILE_SCHEME = "file://"
+
+
+class ImageFileSink:
+    """Streams generated image data to a temp file and atomically renames it into place"""
+    
+    def __init__(self, file_name, progress=None):
+        self.file_name = file_name
+        self.progress = progress
+        self.bytes_written = 0
+        self._file = None
+        self._temp_name = None
+    
+    def begin(self):
+        """Start a new image, discarding any earlier one from the same response"""
+        if self._file is None:
+            directory = os.path.dirname(self.file_name) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, self._temp_name = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+            self._file = os.fdopen(fd, 'wb')
+        else:
+            self._file.seek(0)
+            self._file.truncate()
+        self.bytes_written = 0
+    
+    def write(self, data):
+        """Write image bytes received from one stream chunk and report the running total"""
+        # The SDK hands over each image as one already decoded blob per stream chunk,
+        # so progress can't be finer grained than the chunks themselves
+        self._file.write(data)
+        self.bytes_written += len(data)
+        if self.progress:
+            self.progress(self.bytes_written)
+    
+    def commit(self):
+        """Move the finished image into place, returning its path or None if nothing was written"""
+        if self._file is None:
+            return None
+        self._file.close()
+        # mkstemp creates owner-only files; give the image the permissions open() would
+        os.chmod(self._temp_name, 0o666 & ~_UMASK)
+        os.replace(self._temp_name, self.file_name)
+        self._file = None
+        self._temp_name = None
+        print(f"File saved to: {self.file_name}")
+        return self.file_name
+    
+    def abort(self):
+        """Discard any partially written image"""
+        if self._file is not None:
+            self._file.close()
+            if os.path.exists(self._temp_name):
+                os.remove(self._temp_name)
+            self._file = None
+            self._temp_name = None
+
+
 class GeminiService:
     def __init__(self):
-        self.client = genai.Client(api_key=config.GEMINI_API_KEY)
+        # The google.genai SDK and its client are built on first use, see `client`
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._warm_up_started = False
         self.model = "gemini-2.5-flash-image"
     
-    def save_binary_file(self, file_name, data):
-        """Save binary data to file"""
-        os.makedirs(os.path.dirname(file_name), exist_ok=True)
-        with open(file_name, "wb") as f:
-            f.write(data)
-        print(f"File saved to: {file_name}")
-        return file_name
+    @property
+    def client(self):
+        """Gemini client, importing the SDK and creating it on first access"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from google import genai
+                    self._client = genai.Client(api_key=config.GEMINI_API_KEY)
+        return self._client
     
-    def generate_campaign_image(self, campaign_brief, input_images=None, aspect_ratio="1:1", chat_history=None):
+    def warm_up(self):
         """
-        Generate a campaign image using Gemini
+        Import the SDK, create the client and open a connection to the API in a
+        background thread. Runs at most once per service; returns the thread, or
+        None if a warm-up was already started.
+        """
+        with self._client_lock:
+            if self._warm_up_started:
+                return None
+            self._warm_up_started = True
+        
+        def run():
+            try:
+                # Cheap authenticated call so the client has a live connection in its pool
+                self.client.models.get(model=self.model)
+            except Exception as e:
+                print(f"Gemini warm-up failed: {e}")
+        
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return thread
+    
+    def generate_campaign_image(self, campaign_brief, output_path, input_images=None, aspect_ratio="1:1",
+                                chat_history=None, progress=None):
+        """
+        Generate a campaign image using Gemini, streaming it straight to disk
         
         Args:
             campaign_brief: CampaignBrief object
+            output_path: File path the generated image is saved to
             input_images: List of image file paths to send as reference
             aspect_ratio: Aspect ratio for the image (1:1, 9:16, 16:9)
             chat_history: Previous chat history for follow-up requests
+            progress: Optional callable receiving the bytes written so far
         
         Returns:
-            Tuple of (image_path, chat_history)
+            Tuple of (saved image path or None, chat_history). Generated images
+            in chat_history are file:// references to their saved file instead of
+            the bytes, so the history can only be passed back to this method, not
+            sent to the API directly.
         """
+        from google.genai import types
         # Build the prompt
         if chat_history is None:
             prompt = f"""Given this campaign brief:
@@ -78,6 +175,8 @@ Please generate the image in {aspect_ratio} aspect ratio."""
             contents = chat_history + [types.Content(role="user", parts=parts)]
         else:
             contents = [types.Content(role="user", parts=parts)]
+        history = contents
+        contents = self._load_history_images(contents)
         
         generate_content_config = types.GenerateContentConfig(
             response_modalities=["IMAGE", "TEXT"],
@@ -86,41 +185,94 @@ Please generate the image in {aspect_ratio} aspect ratio."""
             ),
         )
         
-        # Generate content
-        generated_image = None
+        # Generate content, streaming any image to disk as it arrives
+        sink = ImageFileSink(output_path, progress)
         response_text = ""
+        last_chunk = None
         
-        for chunk in self.client.models.generate_content_stream(
-            model=self.model,
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if (
-                chunk.candidates is None
-                or chunk.candidates[0].content is None
-                or chunk.candidates[0].content.parts is None
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=generate_content_config,
             ):
-                continue
-            
-            if chunk.candidates[0].content.parts[0].inline_data and chunk.candidates[0].content.parts[0].inline_data.data:
-                inline_data = chunk.candidates[0].content.parts[0].inline_data
-                generated_image = inline_data.data
-            else:
-                if hasattr(chunk, 'text'):
-                    response_text += chunk.text
+                last_chunk = chunk
+                if (
+                    chunk.candidates is None
+                    or chunk.candidates[0].content is None
+                    or chunk.candidates[0].content.parts is None
+                ):
+                    continue
+                
+                if chunk.candidates[0].content.parts[0].inline_data and chunk.candidates[0].content.parts[0].inline_data.data:
+                    inline_data = chunk.candidates[0].content.parts[0].inline_data
+                    sink.begin()
+                    sink.write(inline_data.data)
+                else:
+                    if hasattr(chunk, 'text'):
+                        response_text += chunk.text
+            saved_path = sink.commit()
+        except BaseException:
+            sink.abort()
+            raise
         
         # Update chat history
-        if chunk.candidates and chunk.candidates[0].content:
-            new_history = contents + [chunk.candidates[0].content]
+        if last_chunk is not None and last_chunk.candidates and last_chunk.candidates[0].content:
+            new_history = history + [self._unload_content_images(last_chunk.candidates[0].content, saved_path)]
         else:
-            new_history = contents
+            new_history = history
         
-        return generated_image, new_history
+        return saved_path, new_history
+    
+    def _unload_content_images(self, content, saved_path):
+        """Replace generated image bytes in a content with a reference to the saved file"""
+        from google.genai import types
+        if not content.parts:
+            return content
+        parts = []
+        for part in content.parts:
+            if part.inline_data and part.inline_data.data:
+                if saved_path is None:
+                    continue
+                part = part.model_copy(update={
+                    'inline_data': None,
+                    'file_data': types.FileData(
+                        file_uri=LOCAL_FILE_SCHEME + os.path.abspath(saved_path),
+                        mime_type=part.inline_data.mime_type or 'image/png'
+                    ),
+                })
+            parts.append(part)
+        return content.model_copy(update={'parts': parts})
+    
+    def _load_history_images(self, contents):
+        """Read saved image files referenced by the history back in for a request"""
+        from google.genai import types
+        loaded = []
+        for content in contents:
+            if content.parts:
+                parts = []
+                for part in content.parts:
+                    if part.file_data and (part.file_data.file_uri or '').startswith(LOCAL_FILE_SCHEME):
+                        file_name = part.file_data.file_uri[len(LOCAL_FILE_SCHEME):]
+                        if not os.path.isfile(file_name):
+                            raise FileNotFoundError(
+                                f"Generated image referenced by chat history is missing: {file_name}"
+                            )
+                        with open(file_name, 'rb') as f:
+                            part = part.model_copy(update={
+                                'file_data': None,
+                                'inline_data': types.Blob(data=f.read(), mime_type=part.file_data.mime_type),
+                            })
+                    parts.append(part)
+                content = content.model_copy(update={'parts': parts})
+            loaded.append(content)
+        return loaded
     
     def check_brand_compliance(self, generated_image_path, input_images, product_name, aspect_ratio=""):
         """
         Check if generated image follows brand guidelines (logo and colors)
         """
+        from google.genai import types
         ratio_text = f" ({aspect_ratio})" if aspect_ratio else ""
         prompt = f"""Check if the generated campaign image for {product_name}{ratio_text} follows brand guidelines.
         
@@ -190,6 +342,7 @@ Overall Result: [PASS/FAIL]
         """
         Check if the generated image contains any prohibited or inappropriate words
         """
+        from google.genai import types
         ratio_text = f" ({aspect_ratio})" if aspect_ratio else ""
         prompt = f"""Analyze the text content in this campaign image for {product_name}{ratio_text}.
         
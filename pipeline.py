@@ -0,0 +1,379 @@
+"""
+Campaign generation and compliance engine shared by the web app and the CLI
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from models import CampaignBrief
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Aspect ratios generated for every brief, in chat order
+ASPECT_RATIOS = ["1:1", "9:16", "16:9"]
+
+
+def list_images(folder):
+    """List image filenames in a folder"""
+    if not os.path.exists(folder):
+        return []
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def list_output_images(output_folder):
+    """Map each product folder to its aspect ratio folders and their image filenames"""
+    output_structure = {}
+    if not os.path.exists(output_folder):
+        return output_structure
+    for product in sorted(os.listdir(output_folder)):
+        product_path = os.path.join(output_folder, product)
+        if os.path.isdir(product_path):
+            output_structure[product] = {}
+            for ratio_folder in sorted(os.listdir(product_path)):
+                ratio_path = os.path.join(product_path, ratio_folder)
+                if os.path.isdir(ratio_path):
+                    output_structure[product][ratio_folder] = list_images(ratio_path)
+    return output_structure
+
+
+def is_output_tree(output_folder):
+    """
+    Check that a folder only holds pipeline output (product folders with aspect
+    ratio folders of images), so it is safe to clear before generating
+    """
+    if not os.path.exists(output_folder):
+        return True
+    if not os.path.isdir(output_folder):
+        return False
+    ratio_folders = {ratio.replace(':', '_') for ratio in ASPECT_RATIOS}
+    for product in os.listdir(output_folder):
+        product_path = os.path.join(output_folder, product)
+        if not os.path.isdir(product_path):
+            return False
+        for ratio_folder in os.listdir(product_path):
+            ratio_path = os.path.join(product_path, ratio_folder)
+            if ratio_folder not in ratio_folders or not os.path.isdir(ratio_path):
+                return False
+            for name in os.listdir(ratio_path):
+                # Allow images and temp files left by an interrupted download
+                is_temp = name.startswith('.') and name.endswith('.part')
+                if not (name.lower().endswith(IMAGE_EXTENSIONS) or is_temp) \
+                        or not os.path.isfile(os.path.join(ratio_path, name)):
+                    return False
+    return True
+
+
+def output_path_for(output_folder, product_folder, aspect_ratio):
+    """Build the output image path for a product and aspect ratio"""
+    ratio_folder = aspect_ratio.replace(':', '_')
+    return os.path.join(output_folder, product_folder, ratio_folder, f"campaign_{ratio_folder}.png")
+
+
+def _map(func, items, concurrency):
+    """Apply func to items, in parallel when concurrency > 1, preserving order"""
+    if concurrency <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(func, items))
+
+
+def generate_campaigns(gemini_service, briefs, input_images, output_folder, log,
+                       concurrency=1, resume=False):
+    """
+    Generate campaign images in every aspect ratio for all briefs
+
+    Args:
+        gemini_service: GeminiService used for generation
+        briefs: List of campaign brief dicts
+        input_images: List of input asset file paths
+        output_folder: Root folder for generated images
+        log: Callable taking (message, log_type)
+        concurrency: Number of briefs generated in parallel
+        resume: Keep existing output and skip briefs already fully generated
+
+    Returns:
+        List of per-brief result dicts
+    """
+    log("🚀 Starting campaign generation process...", 'info')
+
+    # Clear old output images first
+    if os.path.exists(output_folder) and not resume:
+        log("🗑️  Clearing old campaign images...", 'info')
+        shutil.rmtree(output_folder)
+        os.makedirs(output_folder, exist_ok=True)
+        log("✅ Output folder cleared", 'success')
+        # Signal frontend to clear gallery
+        log("", 'gallery_cleared')
+
+    log(f"📝 Processing {len(briefs)} campaign brief(s)", 'info')
+    log(f"📁 Using {len(input_images)} input asset(s)", 'info')
+
+    def process_brief(indexed_brief):
+        idx, brief_data = indexed_brief
+        brief = CampaignBrief.from_dict(brief_data)
+        product_folder = brief.product_name.replace(' ', '_')
+        paths = {ratio: output_path_for(output_folder, product_folder, ratio) for ratio in ASPECT_RATIOS}
+
+        log(f"\n{'='*60}", 'info')
+        log(f"🎨 [{idx}/{len(briefs)}] Processing: {brief.product_name}", 'info')
+        log(f"{'='*60}", 'info')
+
+        if resume and all(os.path.exists(path) for path in paths.values()):
+            log(f"⏭️  Skipping {brief.product_name}, all aspect ratios already generated", 'info')
+            return {
+                "product": brief.product_name,
+                "success": True,
+                "paths": {ratio.replace(':', '_'): path for ratio, path in paths.items()}
+            }
+
+        saved = {}
+        chat_history = None
+        for ratio in ASPECT_RATIOS:
+            ratio_folder = ratio.replace(':', '_')
+            log(f"⏳ Generating {ratio} aspect ratio for {brief.product_name}...", 'info')
+
+            def progress(bytes_written):
+                log(f"📥 Receiving {ratio} image for {brief.product_name}: {bytes_written:,} bytes", 'progress')
+
+            # The first ratio is generated from the brief, the rest extend it via chat history
+            saved_path, chat_history = gemini_service.generate_campaign_image(
+                brief,
+                paths[ratio],
+                input_images if chat_history is None else None,
+                aspect_ratio=ratio,
+                chat_history=chat_history,
+                progress=progress
+            )
+
+            if saved_path:
+                saved[ratio_folder] = saved_path
+                log(f"✅ Saved {ratio} image to: {paths[ratio]}", 'success')
+                # Broadcast image completion to update gallery
+                log(f"{product_folder}/{ratio_folder}/campaign_{ratio_folder}.png", 'image_complete')
+            else:
+                saved[ratio_folder] = None
+                if ratio == ASPECT_RATIOS[0]:
+                    log(f"❌ Failed to generate image for {brief.product_name}", 'error')
+                    return {
+                        "product": brief.product_name,
+                        "success": False,
+                        "error": "Failed to generate image"
+                    }
+                log(f"❌ Failed to generate {ratio} image for {brief.product_name}", 'error')
+
+        missing = [ratio_folder for ratio_folder, path in saved.items() if path is None]
+        if missing:
+            log(f"⚠️  {brief.product_name} is missing aspect ratio(s): {', '.join(missing)}", 'warning')
+            return {
+                "product": brief.product_name,
+                "success": False,
+                "error": f"Failed to generate aspect ratio(s): {', '.join(missing)}",
+                "paths": saved
+            }
+
+        log(f"✨ Completed all aspect ratios for {brief.product_name}", 'success')
+        return {
+            "product": brief.product_name,
+            "success": True,
+            "paths": saved
+        }
+
+    def safe_process_brief(indexed_brief):
+        # Keep one failing brief from losing the rest of the batch
+        try:
+            return process_brief(indexed_brief)
+        except Exception as e:
+            idx, brief_data = indexed_brief
+            product = brief_data.get("product_name") if isinstance(brief_data, dict) else None
+            product = product or f"Brief {idx}"
+            log(f"❌ Error generating {product}: {str(e)}", 'error')
+            return {
+                "product": product,
+                "success": False,
+                "error": str(e)
+            }
+
+    results = _map(safe_process_brief, list(enumerate(briefs, 1)), concurrency)
+
+    log(f"\n{'='*60}", 'info')
+    log(f"🎉 Campaign generation completed!", 'success')
+    log(f"📊 Generated {len([r for r in results if r['success']])} out of {len(results)} campaign(s)", 'info')
+    log(f"{'='*60}\n", 'info')
+    return results
+
+
+class ComplianceCache:
+    """JSON file cache of compliance check results keyed by image content"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(check_name, image_paths, *extra):
+        """Build a cache key from the check name, image bytes and extra arguments"""
+        digest = hashlib.sha256(check_name.encode('utf-8'))
+        for img_path in image_paths:
+            with open(img_path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        for value in extra:
+            digest.update(str(value).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+
+    def save(self):
+        """Write the cache back to disk"""
+        if not self.path:
+            return
+        with self.lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f, indent=2)
+
+
+def run_compliance_checks(gemini_service, input_images, output_folder, log,
+                          report_path='Compliance_Checks.txt', concurrency=1, cache_path=None):
+    """
+    Run brand and prohibited words checks on all generated images
+
+    Args:
+        gemini_service: GeminiService used for the checks
+        input_images: List of input asset file paths for brand compliance
+        output_folder: Root folder of generated images
+        log: Callable taking (message, log_type)
+        report_path: File the compliance report is written to
+        concurrency: Number of products checked in parallel
+        cache_path: Optional JSON file caching results of unchanged images
+
+    Returns:
+        Tuple of (report lines, names of products whose checks raised an error)
+    """
+    log("🔍 Starting compliance checks...", 'info')
+    log(f"📁 Using {len(input_images)} input asset(s) for brand compliance", 'info')
+
+    cache = ComplianceCache(cache_path) if cache_path else None
+
+    # Collect images grouped by product
+    products = []
+    for product, ratio_folders in list_output_images(output_folder).items():
+        images = []
+        for ratio_folder, img_files in ratio_folders.items():
+            for img_file in img_files:
+                images.append((ratio_folder, os.path.join(output_folder, product, ratio_folder, img_file)))
+        products.append((product, images))
+
+    total_checks = sum(len(images) for _, images in products) * 2  # brand + prohibited words
+    log(f"📊 Found {total_checks // 2} image(s) to check", 'info')
+
+    counter = {'count': 0}
+    counter_lock = threading.Lock()
+
+    def next_check():
+        with counter_lock:
+            counter['count'] += 1
+            return counter['count']
+
+    def cached_check(check_name, image_paths, key_args, func, *args):
+        if cache is None:
+            return func(*args)
+        key = ComplianceCache.key(check_name, image_paths, *key_args)
+        result = cache.get(key)
+        if result is None:
+            result = func(*args)
+            cache.set(key, result)
+        else:
+            log(f"💾 Using cached {check_name} result", 'info')
+        return result
+
+    failed_products = []
+
+    def check_product(product_entry):
+        product, images = product_entry
+        product_name = product.replace('_', ' ')
+        lines = []
+
+        log(f"\n{'='*60}", 'info')
+        log(f"🔎 Checking: {product_name}", 'info')
+        log(f"{'='*60}", 'info')
+
+        try:
+            # Check each aspect ratio
+            for ratio_folder, img_path in images:
+                ratio_display = ratio_folder.replace('_', ':')
+
+                # Brand compliance check
+                if input_images:
+                    log(f"⏳ [{next_check()}/{total_checks}] Brand compliance check for {product_name} ({ratio_display})...", 'info')
+                    brand_result = cached_check(
+                        'brand compliance', [img_path] + list(input_images), (product_name, ratio_display),
+                        gemini_service.check_brand_compliance, img_path, input_images, product_name, ratio_display
+                    )
+                    lines.append(brand_result)
+                    lines.append("")  # Add blank line for readability
+
+                    # Determine if passed or failed
+                    if "PASS" in brand_result or "consistent" in brand_result.lower():
+                        log(f"✅ Brand compliance: PASS", 'success')
+                    else:
+                        log(f"⚠️  Brand compliance: Review needed", 'warning')
+
+                # Prohibited words check
+                log(f"⏳ [{next_check()}/{total_checks}] Prohibited words check for {product_name} ({ratio_display})...", 'info')
+                words_result = cached_check(
+                    'prohibited words', [img_path], (product_name, ratio_display),
+                    gemini_service.check_prohibited_words, img_path, product_name, ratio_display
+                )
+                lines.append(words_result)
+                lines.append("=" * 80)  # Add separator for readability
+                lines.append("")  # Add blank line for readability
+
+                # Determine if passed or failed
+                if "PASS" in words_result or "No prohibited" in words_result:
+                    log(f"✅ Prohibited words check: PASS", 'success')
+                else:
+                    log(f"⚠️  Prohibited words check: Review needed", 'warning')
+        except Exception as e:
+            # Keep one failing product from losing the rest of the batch
+            log(f"❌ Error checking {product_name}: {str(e)}", 'error')
+            lines.append(f"{product_name} - Error checking compliance: {str(e)}")
+            lines.append("=" * 80)
+            lines.append("")
+            failed_products.append(product_name)
+        finally:
+            # Persist after every product so finished checks survive a failed run
+            if cache is not None:
+                cache.save()
+
+        return lines
+
+    compliance_results = []
+    for lines in _map(check_product, products, concurrency):
+        compliance_results.extend(lines)
+
+    # Save to the compliance report
+    log(f"\n💾 Saving results to {report_path}...", 'info')
+    with open(report_path, 'w') as f:
+        for result in compliance_results:
+            f.write(result + '\n')
+
+    log(f"\n{'='*60}", 'info')
+    log(f"🎉 Compliance checks completed!", 'success')
+    log(f"📋 Total checks performed: {len(compliance_results)}", 'info')
+    log(f"💾 Results saved to: {report_path}", 'info')
+    log(f"{'='*60}\n", 'info')
+    return compliance_results, sorted(failed_products)
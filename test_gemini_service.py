@@ -0,0 +1,212 @@
+"""
+Tests for the Gemini service: streaming images to disk and lazy client startup
+
+Run with: python -m pytest -q
+"""
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from gemini_service import GeminiService, ImageFileSink
+from models import CampaignBrief
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+try:
+    HAS_GENAI = importlib.util.find_spec('google.genai') is not None
+except ModuleNotFoundError:
+    HAS_GENAI = False
+
+BRIEF = CampaignBrief(
+    product_name="Product A",
+    target_region_market="Texas, USA",
+    target_audience="Game Developers",
+    campaign_message="Message A"
+)
+
+
+class ImageFileSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.target = os.path.join(self.tmp, 'Product', '1_1', 'campaign_1_1.png')
+        self.progress = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def folder_contents(self):
+        return os.listdir(os.path.dirname(self.target))
+
+    def test_one_progress_event_per_chunk(self):
+        sink = ImageFileSink(self.target, self.progress.append)
+        sink.begin()
+        sink.write(b'a' * 200000)
+        sink.write(b'b' * 1000)
+        self.assertEqual(self.progress, [200000, 201000])
+
+    def test_commit_renames_into_place(self):
+        sink = ImageFileSink(self.target)
+        sink.begin()
+        sink.write(b'image')
+        self.assertEqual(sink.commit(), self.target)
+        self.assertEqual(self.folder_contents(), ['campaign_1_1.png'])
+        with open(self.target, 'rb') as f:
+            self.assertEqual(f.read(), b'image')
+
+    def test_new_image_replaces_earlier_one(self):
+        sink = ImageFileSink(self.target)
+        sink.begin()
+        sink.write(b'first image')
+        sink.begin()
+        sink.write(b'second')
+        sink.commit()
+        with open(self.target, 'rb') as f:
+            self.assertEqual(f.read(), b'second')
+
+    def test_commit_without_image_returns_none(self):
+        self.assertIsNone(ImageFileSink(self.target).commit())
+        self.assertFalse(os.path.exists(self.target))
+
+    def test_abort_removes_temp_file(self):
+        sink = ImageFileSink(self.target)
+        sink.begin()
+        sink.write(b'partial')
+        sink.abort()
+        self.assertEqual(self.folder_contents(), [])
+
+    def test_committed_file_has_default_permissions(self):
+        sink = ImageFileSink(self.target)
+        sink.begin()
+        sink.write(b'image')
+        sink.commit()
+        reference = os.path.join(self.tmp, 'reference.png')
+        with open(reference, 'wb') as f:
+            f.write(b'image')
+        self.assertEqual(os.stat(self.target).st_mode, os.stat(reference).st_mode)
+
+    def test_abort_after_failed_rename_removes_temp_file(self):
+        sink = ImageFileSink(self.target)
+        sink.begin()
+        sink.write(b'image')
+        with mock.patch('gemini_service.os.replace', side_effect=OSError("rename failed")):
+            with self.assertRaises(OSError):
+                sink.commit()
+        sink.abort()
+        self.assertEqual(self.folder_contents(), [])
+
+
+class FakeModels:
+    """Stands in for client.models, replaying canned stream chunks"""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.requests = []
+
+    def generate_content_stream(self, model, contents, config):
+        self.requests.append(contents)
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+
+@unittest.skipUnless(HAS_GENAI, "google-genai is not installed")
+class GenerateCampaignImageTest(unittest.TestCase):
+    def setUp(self):
+        from google.genai import types
+        self.types = types
+        self.tmp = tempfile.mkdtemp()
+        self.target = os.path.join(self.tmp, 'Product_A', '1_1', 'campaign_1_1.png')
+        image_part = types.Part(
+            inline_data=types.Blob(data=b'image bytes', mime_type='image/png'),
+            thought_signature=b'signature'
+        )
+        self.chunks = [types.GenerateContentResponse(candidates=[
+            types.Candidate(content=types.Content(role='model', parts=[image_part]))
+        ])]
+        self.progress = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make_service(self, models):
+        service = GeminiService()
+        service._client = mock.Mock(models=models)
+        return service
+
+    def generate(self, service, chat_history=None, aspect_ratio="1:1"):
+        return service.generate_campaign_image(
+            BRIEF, self.target, aspect_ratio=aspect_ratio, chat_history=chat_history, progress=self.progress.append
+        )
+
+    def test_saves_image_and_keeps_no_bytes_in_history(self):
+        saved_path, history = self.generate(self.make_service(FakeModels(self.chunks)))
+
+        self.assertEqual(saved_path, self.target)
+        with open(self.target, 'rb') as f:
+            self.assertEqual(f.read(), b'image bytes')
+        self.assertEqual(self.progress, [len(b'image bytes')])
+
+        parts = [part for content in history for part in content.parts]
+        self.assertFalse(any(part.inline_data for part in parts))
+        image_part = history[-1].parts[0]
+        self.assertEqual(image_part.file_data.file_uri, 'file://' + os.path.abspath(self.target))
+        self.assertEqual(image_part.thought_signature, b'signature')
+
+    def test_follow_up_sends_reloaded_image(self):
+        service = self.make_service(FakeModels(self.chunks))
+        _, history = self.generate(service)
+        self.generate(service, chat_history=history, aspect_ratio="9:16")
+
+        sent_parts = [part for content in service.client.models.requests[-1] for part in content.parts]
+        images = [part for part in sent_parts if part.inline_data]
+        self.assertEqual(len(images), 1)
+        self.assertEqual(images[0].inline_data.data, b'image bytes')
+        self.assertEqual(images[0].thought_signature, b'signature')
+        self.assertFalse(any(part.file_data for part in sent_parts))
+
+    def test_missing_history_image_raises(self):
+        service = self.make_service(FakeModels(self.chunks))
+        _, history = self.generate(service)
+        os.remove(self.target)
+
+        with self.assertRaises(FileNotFoundError):
+            self.generate(service, chat_history=history, aspect_ratio="9:16")
+
+    def test_stream_error_leaves_no_partial_file(self):
+        service = self.make_service(FakeModels(self.chunks, error=RuntimeError("connection reset")))
+
+        with self.assertRaises(RuntimeError):
+            self.generate(service)
+        self.assertEqual(os.listdir(os.path.dirname(self.target)), [])
+
+
+class LazyClientTest(unittest.TestCase):
+    def test_startup_does_not_load_sdk(self):
+        # Run in a fresh interpreter so modules imported by other tests don't count
+        modules = ['cli', 'pipeline', 'gemini_service']
+        if importlib.util.find_spec('flask'):
+            modules.append('app')
+        script = (
+            f"import sys, {', '.join(modules)}\n"
+            "service = gemini_service.GeminiService()\n"
+            "assert service._client is None\n"
+            "assert 'google.genai' not in sys.modules, 'google.genai imported at startup'\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_warm_up_runs_once(self):
+        client = mock.Mock()
+        with mock.patch.object(GeminiService, 'client', new_callable=mock.PropertyMock, return_value=client):
+            service = GeminiService()
+            service.warm_up().join()
+            self.assertIsNone(service.warm_up())
+        client.models.get.assert_called_once_with(model=service.model)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+"""
+Tests for the pipeline engine and CLI using a stub Gemini service
+
+Run with: python -m pytest -q
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import cli
+import pipeline
+
+BRIEFS = [
+    {
+        "product_name": "Product A",
+        "target_region_market": "Texas, USA",
+        "target_audience": "Game Developers",
+        "campaign_message": "Message A"
+    },
+    {
+        "product_name": "Product B",
+        "target_region_market": "Paris, France",
+        "target_audience": "Photographers",
+        "campaign_message": "Message B"
+    },
+]
+
+
+class StubGeminiService:
+    """Stands in for GeminiService without calling the API"""
+
+    def __init__(self, fail_ratios=(), raise_for=(), delays=None, raise_checks_for=()):
+        self.fail_ratios = fail_ratios
+        self.raise_for = raise_for
+        self.delays = delays or {}
+        self.raise_checks_for = raise_checks_for
+        self.generate_calls = []
+        self.check_calls = []
+        self.lock = threading.Lock()
+
+    def generate_campaign_image(self, campaign_brief, output_path, input_images=None, aspect_ratio="1:1",
+                                chat_history=None, progress=None):
+        with self.lock:
+            self.generate_calls.append((campaign_brief.product_name, aspect_ratio))
+        time.sleep(self.delays.get(campaign_brief.product_name, 0))
+        if campaign_brief.product_name in self.raise_for:
+            raise RuntimeError("API unavailable")
+        if aspect_ratio in self.fail_ratios:
+            return None, chat_history
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(f"{campaign_brief.product_name} {aspect_ratio}".encode())
+        return output_path, (chat_history or []) + [aspect_ratio]
+
+    def _check(self, kind, product_name, aspect_ratio):
+        with self.lock:
+            self.check_calls.append((kind, product_name, aspect_ratio))
+        if product_name in self.raise_checks_for:
+            raise RuntimeError("API unavailable")
+        return f"PRODUCT: {product_name}\nASPECT RATIO: {aspect_ratio}\n{kind}\nOverall Result: PASS"
+
+    def check_brand_compliance(self, generated_image_path, input_images, product_name, aspect_ratio=""):
+        return self._check('brand', product_name, aspect_ratio)
+
+    def check_prohibited_words(self, generated_image_path, product_name, aspect_ratio=""):
+        return self._check('words', product_name, aspect_ratio)
+
+
+def quiet_log(message, log_type='info'):
+    pass
+
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, 'output')
+        self.report = os.path.join(self.tmp, 'Compliance_Checks.txt')
+        self.cache = os.path.join(self.tmp, 'cache.json')
+        self.asset = os.path.join(self.tmp, 'logo.png')
+        with open(self.asset, 'wb') as f:
+            f.write(b'logo')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+
+class GenerateCampaignsTest(PipelineTestCase):
+    def test_generates_every_ratio(self):
+        results = pipeline.generate_campaigns(StubGeminiService(), BRIEFS, [], self.output, quiet_log)
+        self.assertTrue(all(result['success'] for result in results))
+        for ratio in pipeline.ASPECT_RATIOS:
+            self.assertTrue(os.path.isfile(pipeline.output_path_for(self.output, 'Product_A', ratio)))
+
+    def test_concurrent_results_keep_brief_order(self):
+        service = StubGeminiService(delays={"Product A": 0.05})
+        results = pipeline.generate_campaigns(service, BRIEFS, [], self.output, quiet_log, concurrency=2)
+        self.assertEqual([result['product'] for result in results], ["Product A", "Product B"])
+
+    def test_missing_ratio_fails_brief(self):
+        results = pipeline.generate_campaigns(
+            StubGeminiService(fail_ratios=("9:16",)), BRIEFS, [], self.output, quiet_log
+        )
+        self.assertFalse(results[0]['success'])
+        self.assertIsNone(results[0]['paths']['9_16'])
+        self.assertIsNotNone(results[0]['paths']['16_9'])
+
+    def test_exception_in_one_brief_keeps_others(self):
+        results = pipeline.generate_campaigns(
+            StubGeminiService(raise_for=("Product A",)), BRIEFS, [], self.output, quiet_log
+        )
+        self.assertFalse(results[0]['success'])
+        self.assertIn("API unavailable", results[0]['error'])
+        self.assertTrue(results[1]['success'])
+
+    def test_resume_skips_finished_briefs(self):
+        pipeline.generate_campaigns(StubGeminiService(), BRIEFS, [], self.output, quiet_log)
+        os.remove(pipeline.output_path_for(self.output, 'Product_B', '16:9'))
+
+        service = StubGeminiService()
+        results = pipeline.generate_campaigns(service, BRIEFS, [], self.output, quiet_log, resume=True)
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual({product for product, _ in service.generate_calls}, {"Product B"})
+
+
+class ComplianceChecksTest(PipelineTestCase):
+    def setUp(self):
+        super().setUp()
+        pipeline.generate_campaigns(StubGeminiService(), BRIEFS, [], self.output, quiet_log)
+
+    def run_checks(self, service, **kwargs):
+        return pipeline.run_compliance_checks(
+            service, [self.asset], self.output, quiet_log, report_path=self.report, **kwargs
+        )
+
+    def test_writes_report(self):
+        lines, failed = self.run_checks(StubGeminiService())
+        self.assertEqual(failed, [])
+        with open(self.report) as f:
+            report = f.read()
+        self.assertIn("PRODUCT: Product A", report)
+        self.assertIn("PRODUCT: Product B", report)
+
+    def test_cache_skips_unchanged_images(self):
+        self.run_checks(StubGeminiService(), cache_path=self.cache)
+        service = StubGeminiService()
+        self.run_checks(service, cache_path=self.cache)
+        self.assertEqual(service.check_calls, [])
+
+    def test_cache_key_changes_with_image_content(self):
+        image = pipeline.output_path_for(self.output, 'Product_A', '1:1')
+        key = pipeline.ComplianceCache.key('prohibited words', [image], 'Product A', '1:1')
+        with open(image, 'wb') as f:
+            f.write(b'changed')
+        self.assertNotEqual(key, pipeline.ComplianceCache.key('prohibited words', [image], 'Product A', '1:1'))
+
+    def test_cache_saved_when_a_product_fails(self):
+        lines, failed = self.run_checks(StubGeminiService(raise_checks_for=("Product A",)), cache_path=self.cache)
+        self.assertEqual(failed, ["Product A"])
+
+        service = StubGeminiService()
+        self.run_checks(service, cache_path=self.cache)
+        self.assertEqual({product for _, product, _ in service.check_calls}, {"Product A"})
+
+
+class CliTest(PipelineTestCase):
+    def setUp(self):
+        super().setUp()
+        self.briefs = os.path.join(self.tmp, 'briefs.json')
+        with open(self.briefs, 'w') as f:
+            json.dump(BRIEFS, f)
+        self.assets = os.path.join(self.tmp, 'assets')
+        os.makedirs(self.assets)
+
+    def run_cli(self, service, *extra):
+        args = cli.parse_args([
+            '--briefs', self.briefs, '--assets', self.assets,
+            '--output', self.output, '--report', self.report, *extra
+        ])
+        with mock.patch('cli.GeminiService', return_value=service):
+            return cli.run(args, quiet_log)
+
+    def test_refuses_to_clear_foreign_output_folder(self):
+        os.makedirs(self.output)
+        with open(os.path.join(self.output, 'notes.txt'), 'w') as f:
+            f.write('keep me')
+        with mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+            cli.parse_args(['--output', self.output])
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'notes.txt')))
+
+    def test_accepts_existing_output_tree(self):
+        pipeline.generate_campaigns(StubGeminiService(), BRIEFS, [], self.output, quiet_log)
+        self.assertEqual(cli.parse_args(['--output', self.output]).output, self.output)
+
+    def test_exit_zero_on_success(self):
+        self.assertEqual(self.run_cli(StubGeminiService()), 0)
+
+    def test_exit_non_zero_when_a_ratio_fails(self):
+        self.assertEqual(self.run_cli(StubGeminiService(fail_ratios=("16:9",))), 1)
+
+    def test_exit_non_zero_when_a_brief_raises(self):
+        self.assertEqual(self.run_cli(StubGeminiService(raise_for=("Product B",))), 1)
+
+    def test_exit_non_zero_when_a_check_raises(self):
+        self.assertEqual(self.run_cli(StubGeminiService(raise_checks_for=("Product B",))), 1)
+
+    def test_make_logger_writes_json_lines(self):
+        lines = []
+        stream = argparse.Namespace(write=lines.append, flush=lambda: None)
+        log = cli.make_logger(stream)
+        log("hello", 'success')
+        message = json.loads(lines[0])
+        self.assertEqual((message['type'], message['message']), ('success', 'hello'))
+
+
+if __name__ == '__main__':
+    unittest.main()